@@ -6,44 +6,41 @@
 # ===========================================
 # 1) Imports and Dependencies
 # ===========================================
+import base64
+import csv
+import hashlib
+import html
+import io
+import math
 import os
 import re
 import shutil
 import time
-import base64
-import tempfile
-import ffmpeg
+import threading
 import cohere
-import cv2
+import faiss
 import json
 import google.generativeai as genai
-import pandas as pd
-import requests
-import speech_recognition as sr
+import numpy as np
 import streamlit as st
-import torch
-import torch._classes
-import whisper
-from bs4 import BeautifulSoup
+import streamlit.components.v1 as components
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 from fpdf import FPDF
-from googletrans import Translator, LANGUAGES
-from langchain.chains import RetrievalQA
 from langchain.chains.question_answering import load_qa_chain
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.prompts import PromptTemplate
-from langchain_experimental.agents import create_csv_agent
 from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from PIL import Image
-from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
-from PyPDF2 import PdfReader
-from transformers import BertTokenizer, BertForSequenceClassification
-from streamlit import components
-import yt_dlp
+
+# Heavy, path-specific dependencies (whisper/torch, ffmpeg, openpyxl,
+# python-pptx, pypdfium2, yt_dlp) are imported inside the functions that use them, so
+# they are only loaded once a matching upload is processed.
 
 # ===========================================
 # 2) Global Configurations and Session State
@@ -52,18 +49,39 @@ import yt_dlp
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize Cohere client
-cohere_client = cohere.Client(os.getenv("COHERE_API_KEY"))
+# Cohere client, cached across Streamlit reruns
+@st.cache_resource(show_spinner=False)
+def get_cohere_client():
+    return cohere.Client(os.getenv("COHERE_API_KEY"))
+
+# Upper bound on threads used to parse uploaded documents in parallel
+MAX_INGEST_WORKERS = 8
 
 # Directory to store uploads
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-# Initialize Google Generative AI embeddings
-embeddings = GoogleGenerativeAIEmbeddings(
-    model="models/embedding-001",
-    api_key=os.getenv("GOOGLE_API_KEY"),
-)
+# Google Generative AI embeddings, cached across Streamlit reruns
+@st.cache_resource(show_spinner=False)
+def get_embeddings():
+    return GoogleGenerativeAIEmbeddings(
+        model="models/embedding-001",
+        api_key=os.getenv("GOOGLE_API_KEY"),
+    )
+
+# Embedding request limits (provider caps batch requests at 100 texts)
+EMBEDDING_BATCH_SIZE = 100
+EMBEDDING_MAX_RETRIES = 3
+
+# FAISS index parameters: HNSW graph by default, IVF-PQ for very large corpora
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+IVFPQ_MIN_VECTORS = 50000
+IVFPQ_NPROBE = 16
+
+# Number of query vectors kept per session for repeated questions
+QUERY_EMBEDDING_CACHE_SIZE = 64
 
 # Initialize or reset session states
 if 'conversation_history' not in st.session_state:
@@ -130,42 +148,96 @@ def handle_file_upload(uploaded_file):
 
 def load_excel_and_convert_to_csv(file):
     """
-    Read an Excel file and convert it to a CSV format.
+    Read the first sheet of an Excel file and convert it to a CSV format,
+    streaming rows in read-only mode instead of building a DataFrame.
     Returns a string of CSV data.
     """
+    import openpyxl
+
     try:
-        df = pd.read_excel(file, engine="openpyxl")
-        print(f"[DEBUG] Loaded Excel with {df.shape[0]} rows and {df.shape[1]} columns.")
-        return df.to_csv(index=False)
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            num_rows = 0
+            for row in workbook.worksheets[0].iter_rows(values_only=True):
+                if all(cell is None for cell in row):
+                    continue
+                writer.writerow(row)
+                num_rows += 1
+        finally:
+            workbook.close()
+
+        print(f"[DEBUG] Loaded Excel with {num_rows} rows.")
+        return buffer.getvalue()
     except Exception as e:
         print(f"[ERROR] Reading Excel file: {e}")
         return f"Error: {str(e)}"
 
+def iter_shape_text(shapes):
+    """
+    Yield the text of each shape on a slide, descending into grouped shapes
+    and reading tables row by row.
+    """
+    from pptx.shapes.group import GroupShape
+
+    # Check the shape class rather than shape.shape_type, which raises for
+    # <p:sp> shapes python-pptx doesn't recognise (e.g. without a prstGeom)
+    for shape in shapes:
+        if isinstance(shape, GroupShape):
+            yield from iter_shape_text(shape.shapes)
+        elif shape.has_text_frame:
+            yield shape.text_frame.text
+        elif shape.has_table:
+            for row in shape.table.rows:
+                yield " | ".join(cell.text for cell in row.cells)
+
 def get_ppt_content(file):
     """
     Extract text content from each slide of a PPTX file.
     """
-    slides_content = []
+    from pptx import Presentation
+
     prs = Presentation(file)
-    for slide in prs.slides:
-        slide_text = "".join(
-            [shape.text for shape in slide.shapes if hasattr(shape, "text")]
-        )
-        slides_content.append(slide_text)
+    content = "\n".join(
+        "\n".join(iter_shape_text(slide.shapes)) for slide in prs.slides
+    )
+
+    print(f"[DEBUG] Extracted {len(prs.slides)} slides from PPT.")
+    return content
+
+# PDFium is not thread-safe, so PDF parsing is serialized across all ingestion
+# threads and sessions. Streamlit re-executes this script on every rerun, so the
+# lock is created once per process through the resource cache.
+@st.cache_resource(show_spinner=False)
+def get_pdfium_lock():
+    return threading.Lock()
+
+def iter_pdf_pages(file):
+    """
+    Lazily yield the text of each page in a PDF file using PDFium.
+    """
+    import pypdfium2 as pdfium
 
-    print(f"[DEBUG] Extracted {len(slides_content)} slides from PPT.")
-    return "\n".join(slides_content)
+    pdf = pdfium.PdfDocument(file)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            yield textpage.get_text_range()
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
 
 def get_pdf_text(file):
     """
-    Extract all text from a PDF file.
+    Extract all text from a PDF file, keeping a blank line between pages so the
+    text splitter can prefer page boundaries.
     """
-    text = ""
-    pdf_reader = PdfReader(file)
-    for page in pdf_reader.pages:
-        text += page.extract_text()
+    with get_pdfium_lock():
+        text = "\n\n".join(iter_pdf_pages(file))
 
-    print(f"[DEBUG] Extracted {len(text.split())} words from PDF.")
+    print(f"[DEBUG] Extracted {len(text)} characters from PDF.")
     return text
 
 # ===========================================
@@ -174,45 +246,72 @@ def get_pdf_text(file):
 
 def extract_audio(video_path):
     """
-    Extract audio from a video file and save it as a WAV file.
-    Returns the path to the WAV file or None on failure.
+    Decode the audio track of a video file straight into memory via an ffmpeg pipe.
+    Returns a 16 kHz mono float32 waveform (as Whisper expects) or None on failure.
     """
     if not os.path.exists(video_path):
         print(f"[ERROR] Video file does not exist: {video_path}")
         return None
 
-    audio_output = os.path.splitext(video_path)[0] + ".wav"
+    import ffmpeg
+
     try:
-        (
+        out, _ = (
             ffmpeg
             .input(video_path)
-            .output(audio_output, format='wav', acodec='pcm_s16le', ar='16000')
-            .run(overwrite_output=True)
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=16000)
+            .run(capture_stdout=True, quiet=True)
         )
-        if os.path.exists(audio_output):
-            print(f"[INFO] Audio extracted and saved to: {audio_output}")
-            return audio_output
-        else:
+        if not out:
             print("[ERROR] Audio extraction failed.")
             return None
+
+        audio = np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+        print(f"[INFO] Audio extracted: {audio.shape[0] / 16000:.1f}s of samples.")
+        return audio
+    except ffmpeg.Error as e:
+        stderr = e.stderr.decode(errors="replace") if e.stderr else ""
+        print(f"[ERROR] Extracting audio: ffmpeg failed:\n{stderr}")
+        return None
     except Exception as e:
         print(f"[ERROR] Extracting audio: {e}")
         return None
 
-# Load a Whisper model for audio transcription
-WHISPER_MODEL = whisper.load_model("base")
+# Load a Whisper model for audio transcription once per server process,
+# on the GPU whenever CUDA is available
+@st.cache_resource(show_spinner="Loading Whisper model...")
+def get_whisper():
+    import torch
+    import whisper
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return whisper.load_model("base", device=device)
+
+# Don't prompt each 30s window with the previous window's text: decoder prompts
+# stay short and a repetition loop can't carry over into later windows. Whisper's
+# default temperature fallback is kept as its guard against hallucination loops.
+WHISPER_DECODE_OPTIONS = {
+    "condition_on_previous_text": False,
+}
+
+def run_whisper(audio):
+    """
+    Run Whisper on a file path or 16 kHz float32 waveform.
+    """
+    model = get_whisper()
+    return model.transcribe(audio, fp16=(model.device.type == "cuda"), **WHISPER_DECODE_OPTIONS)
 
-def transcribe_audio(audio_file_path):
+def transcribe_audio(audio):
     """
-    Transcribe speech from an audio file using Whisper.
-    Returns the transcription text.
+    Transcribe speech using Whisper, from an audio file path or an in-memory
+    16 kHz float32 waveform. Returns the transcription text.
     """
-    if not isinstance(audio_file_path, str) or not os.path.exists(audio_file_path):
-        print(f"[ERROR] Invalid file path: {audio_file_path}")
+    if not isinstance(audio, np.ndarray) and (not isinstance(audio, str) or not os.path.exists(audio)):
+        print(f"[ERROR] Invalid file path: {audio}")
         return None
 
     try:
-        result = WHISPER_MODEL.transcribe(audio_file_path)
+        result = run_whisper(audio)
         transcription = result["text"]
         print(f"[DEBUG] Transcription preview: {transcription[:100]}...")
         return transcription
@@ -229,7 +328,7 @@ def transcribe_youtube_audio(audio_file_path):
         return None
 
     try:
-        result = WHISPER_MODEL.transcribe(audio_file_path)
+        result = run_whisper(audio_file_path)
         transcription = result["text"]
         print(f"[DEBUG] Transcription preview: {transcription[:100]}...")
         return transcription
@@ -242,10 +341,10 @@ def process_video(uploaded_video):
     """
     Process an uploaded video file:
     1. Upload and save the video locally.
-    2. Extract audio from the video.
+    2. Extract audio from the video into memory.
     3. Transcribe the audio using Whisper.
-    4. Update the Vector Store with the transcription.
-    5. Clean up temporary files.
+    4. Add the transcription to the Vector Store.
+    5. Clean up the temporary video file.
     """
     if not uploaded_video:
         return False
@@ -257,29 +356,27 @@ def process_video(uploaded_video):
             return False
 
         # Extract audio
-        audio_path = extract_audio(video_path)
-        if not audio_path:
+        audio = extract_audio(video_path)
+        if audio is None:
             print("[ERROR] Failed to extract audio from video.")
             return False
 
         # Transcribe the audio
-        transcription = transcribe_audio(audio_path)
+        transcription = transcribe_audio(audio)
         if transcription:
             # Update session content
             if 'content' not in st.session_state:
                 st.session_state.content = ""
             st.session_state.content += transcription + "\n"
 
-            # Rebuild the vector store
-            clear_old_index()
-            text_chunks = get_text_chunks(st.session_state.content)
-            st.session_state.vector_store = get_vector_store(text_chunks, "vector_store_index")
+            # Add only the new transcription to the vector store
+            text_chunks = get_text_chunks(transcription)
+            st.session_state.vector_store = add_to_vector_store(text_chunks, "vector_store_index")
             st.session_state.documents_processed = True
 
             # Clean up temporary files
             try:
                 os.remove(video_path)
-                os.remove(audio_path)
                 print("[INFO] Temporary files cleaned up.")
             except Exception as e:
                 print(f"[WARNING] Could not remove temporary files: {e}")
@@ -322,10 +419,8 @@ def process_audio(uploaded_audio):
             ).split_text(transcription)
 
             # Create the FAISS vector store
-            st.session_state.vector_store = FAISS.from_texts(
-                texts=text_chunks,
-                embedding=embeddings,
-                normalize_L2=True
+            st.session_state.vector_store = build_vector_store(
+                embed_text_chunks(deduplicate_chunks(text_chunks))
             )
 
             # Save the updated vector store locally
@@ -356,6 +451,8 @@ def download_youtube_audio(youtube_url, output_path="YoutubeAudios"):
     Download audio from a YouTube URL using yt-dlp.
     Returns the path to the downloaded audio file.
     """
+    import yt_dlp
+
     try:
         if not os.path.exists(output_path):
             os.makedirs(output_path)
@@ -392,7 +489,7 @@ def process_youtube_url(youtube_url):
     Process a YouTube URL:
     1. Download the audio
     2. Transcribe it
-    3. Update the Vector Store with the transcription
+    3. Add the transcription to the Vector Store
     4. Clean up temporary files
     """
     if not youtube_url or not youtube_url.strip():
@@ -418,10 +515,9 @@ def process_youtube_url(youtube_url):
             st.session_state.content = ""
         st.session_state.content += f"YouTube Transcription:\n{transcription}\n"
         
-        # Rebuild the vector store
-        clear_old_index()
-        text_chunks = get_text_chunks(st.session_state.content)
-        st.session_state.vector_store = get_vector_store(text_chunks, "vector_store_index")
+        # Add only the new transcription to the vector store
+        text_chunks = get_text_chunks(f"YouTube Transcription:\n{transcription}\n")
+        st.session_state.vector_store = add_to_vector_store(text_chunks, "vector_store_index")
         st.session_state.documents_processed = True
         
         # Clean up temporary files
@@ -441,12 +537,27 @@ def process_youtube_url(youtube_url):
 # 5) Text Processing & Vector Store Functions
 # ===========================================
 
+@st.cache_resource(show_spinner=False)
+def get_text_splitter():
+    """
+    Return a token-aware text splitter, so chunk sizes are measured in tokens
+    (as the embedding model's input window is) rather than characters.
+    """
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        encoding_name="cl100k_base",
+        chunk_size=256,
+        chunk_overlap=32,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+
 def get_text_chunks(text):
     """
     Split the provided text into chunks for vector storage.
     """
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    return text_splitter.split_text(text)
+    return get_text_splitter().split_text(text)
+
+# Lone surrogates plus everything outside the Basic Multilingual Plane (emojis etc.)
+_UNSUPPORTED_CHARS_RE = re.compile(r'[\ud800-\udfff\U00010000-\U0010ffff]')
 
 def clean_text(text):
     """
@@ -456,22 +567,136 @@ def clean_text(text):
     if not text:
         return ""
 
-    # Replace invalid UTF-8 chars
-    text = text.encode("utf-8", "replace").decode("utf-8")
+    # Remove lone surrogates (not encodable as UTF-8), emojis & special symbols
+    return _UNSUPPORTED_CHARS_RE.sub('', text).strip()
+
+def deduplicate_chunks(text_chunks):
+    """
+    Drop empty and exactly repeated chunks (e.g. page headers/footers, slide
+    template text) so each distinct chunk is embedded and indexed only once.
+    """
+    seen = set()
+    unique_chunks = []
+    for chunk in text_chunks:
+        if not chunk:
+            continue
+        digest = hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).digest()
+        if digest not in seen:
+            seen.add(digest)
+            unique_chunks.append(chunk)
+    return unique_chunks
+
+def embed_text_chunks(text_chunks, batch_size=EMBEDDING_BATCH_SIZE, max_retries=EMBEDDING_MAX_RETRIES):
+    """
+    Embed text chunks with batched embed_documents calls, retrying each batch
+    with exponential backoff. Returns a list of (text, vector) pairs.
+    """
+    vectors = []
+    for start in range(0, len(text_chunks), batch_size):
+        batch = text_chunks[start : start + batch_size]
+        for attempt in range(max_retries):
+            try:
+                vectors.extend(get_embeddings().embed_documents(batch))
+                break
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    raise
+                delay = 2 ** attempt
+                print(f"[WARNING] Embedding batch failed ({e}); retrying in {delay}s...")
+                time.sleep(delay)
+
+    print(f"[DEBUG] Embedded {len(vectors)} chunks in {-(-len(text_chunks) // batch_size)} batch(es).")
+    return list(zip(text_chunks, vectors))
 
-    # Remove emojis & special symbols
-    text = re.sub(r'[\U00010000-\U0010ffff]', '', text)
+def create_faiss_index(vectors):
+    """
+    Build an empty approximate-nearest-neighbour FAISS index sized for the given vectors.
+    Uses HNSW by default and a trained IVF-PQ index once the corpus gets very large.
+    Vectors are expected to be L2-normalized, so inner product equals cosine similarity.
+    """
+    num_vectors, dimension = vectors.shape
+
+    if num_vectors >= IVFPQ_MIN_VECTORS and dimension % 8 == 0:
+        nlist = int(math.sqrt(num_vectors))
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, dimension // 8, 8, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.nprobe = IVFPQ_NPROBE
+        print(f"[INFO] Trained IVF-PQ index with {nlist} lists on {num_vectors} vectors.")
+        return index
+
+    index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.hnsw.efSearch = HNSW_EF_SEARCH
+    return index
+
+def build_vector_store(text_embeddings):
+    """
+    Wrap (text, vector) pairs in a LangChain FAISS store backed by an ANN index.
+    Vectors are L2-normalized once here and searched by inner product (cosine).
+    """
+    texts = [text for text, _ in text_embeddings]
+    vectors = np.asarray([vector for _, vector in text_embeddings], dtype=np.float32)
+    faiss.normalize_L2(vectors)
+
+    vector_store = FAISS(
+        embedding_function=get_embeddings(),
+        index=create_faiss_index(vectors),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+    )
+    vector_store.add_embeddings(zip(texts, vectors))
+    return vector_store
 
-    return text.strip()
+def embed_query(query):
+    """
+    Embed a search query and L2-normalize it to match the indexed vectors.
+    The most recent vectors are cached in session state so a repeated query
+    is embedded only once.
+    """
+    query_embeddings = st.session_state.setdefault("query_embeddings", {})
+    if query not in query_embeddings:
+        vector = np.asarray([get_embeddings().embed_query(query)], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        if len(query_embeddings) >= QUERY_EMBEDDING_CACHE_SIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            query_embeddings.pop(next(iter(query_embeddings)))
+        query_embeddings[query] = vector[0].tolist()
+    return query_embeddings[query]
 
 def get_vector_store(text_chunks, vector_store_path):
     """
     Create a FAISS vector store from text chunks after cleaning.
     """
-    cleaned_chunks = [clean_text(chunk) for chunk in text_chunks]
-    vector_store = FAISS.from_texts(cleaned_chunks, embedding=embeddings)
+    cleaned_chunks = deduplicate_chunks(clean_text(chunk) for chunk in text_chunks)
+    text_embeddings = embed_text_chunks(cleaned_chunks)
+    vector_store = build_vector_store(text_embeddings)
     vector_store.save_local(vector_store_path)
-    print(f"[INFO] FAISS index created with {len(cleaned_chunks)} chunks.")
+    print(f"[INFO] FAISS index created with {len(cleaned_chunks)} unique chunks (of {len(text_chunks)}).")
+    return vector_store
+
+def add_to_vector_store(text_chunks, vector_store_path):
+    """
+    Append new text chunks to the session's FAISS vector store in place, or create
+    the store if none exists yet. Previously indexed content is not re-embedded.
+    """
+    vector_store = st.session_state.vector_store
+    if vector_store is None:
+        return get_vector_store(text_chunks, vector_store_path)
+
+    cleaned_chunks = deduplicate_chunks(clean_text(chunk) for chunk in text_chunks)
+    if not cleaned_chunks:
+        return vector_store
+
+    text_embeddings = embed_text_chunks(cleaned_chunks)
+    texts = [text for text, _ in text_embeddings]
+    vectors = np.asarray([vector for _, vector in text_embeddings], dtype=np.float32)
+    faiss.normalize_L2(vectors)
+
+    vector_store.add_embeddings(zip(texts, vectors))
+    vector_store.save_local(vector_store_path)
+    print(f"[INFO] Added {len(cleaned_chunks)} chunks to FAISS index ({vector_store.index.ntotal} total).")
     return vector_store
 
 def load_vector_store(vector_store_path):
@@ -482,22 +707,36 @@ def load_vector_store(vector_store_path):
         print("[WARNING] No FAISS index found. Returning an empty vector store.")
         return None
     print(f"[INFO] FAISS index loaded from: {vector_store_path}")
-    return FAISS.load_local(vector_store_path, embeddings, allow_dangerous_deserialization=True)
+    return FAISS.load_local(
+        vector_store_path,
+        get_embeddings(),
+        allow_dangerous_deserialization=True,
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+    )
 
 # ===========================================
 # 6) Q&A Chain and Retrieval Functions
 # ===========================================
 
+@st.cache_resource(show_spinner=False)
+def get_chat_model():
+    """
+    Return the ChatGoogleGenerativeAI model used for document Q&A, cached across reruns.
+    """
+    return ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest", temperature=0.3)
+
+@st.cache_resource(show_spinner=False)
 def get_conversational_chain():
     """
     Return a Q&A chain configured for a ChatGoogleGenerativeAI model (Gemini 1.5).
+    Built once and reused for every question.
     """
     prompt_template = """
     Answer the question as detailed as possible from the provided context. 
     If the answer is not in the context, respond with: "Answer is not available in the context."
     Context:\n {context}\nQuestion:\n{question}\nAnswer:
     """
-    model = ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest", temperature=0.3)
+    model = get_chat_model()
     prompt = PromptTemplate(template=prompt_template, input_variables=["context", "question"])
     return load_qa_chain(model, chain_type="stuff", prompt=prompt)
 
@@ -515,10 +754,11 @@ def get_late_chunked_text(retrieved_docs, chunk_size=1000, chunk_overlap=100):
         else:
             text = clean_text(str(doc))
 
-        start = 0
-        while start < len(text):
-            chunked_docs.append(Document(page_content=text[start : start + chunk_size]))
-            start += chunk_size - chunk_overlap
+        step = chunk_size - chunk_overlap
+        chunked_docs.extend(
+            Document(page_content=text[start : start + chunk_size])
+            for start in range(0, len(text), step)
+        )
 
     return chunked_docs
 
@@ -538,7 +778,7 @@ def retrieve_documents(query):
             print("[WARNING] No vector store available for retrieval.")
             return []
 
-        retrieved_docs = vector_store.similarity_search(query)
+        retrieved_docs = vector_store.similarity_search_by_vector(embed_query(query))
 
         # Debug info
         print("\n==============================")
@@ -572,23 +812,31 @@ def process_question(question, retrieved_docs):
 # 7) Query Improvement and Processing
 # ===========================================
 
+@st.cache_data(max_entries=1024, show_spinner=False)
+def generate_related_terms(query):
+    """
+    Ask Cohere for related search terms. Cached per query so repeated questions
+    skip the network round-trip; failures raise and are therefore not cached.
+    """
+    response = get_cohere_client().generate(
+        model="command",
+        prompt=(
+            f"Provide a list of related search terms (separated by commas) for improving retrieval. "
+            f"Do NOT change the meaning of the query: '{query}'"
+        ),
+        max_tokens=15
+    )
+
+    related_terms = response.generations[0].text.strip()
+    # Clean and join the terms
+    return ", ".join([term.strip() for term in related_terms.split(",") if term.strip()])
+
 def fetch_related_terms(query):
     """
     Use Cohere to fetch a list of related terms for short queries, improving retrieval.
     """
     try:
-        response = cohere_client.generate(
-            model="command",
-            prompt=(
-                f"Provide a list of related search terms (separated by commas) for improving retrieval. "
-                f"Do NOT change the meaning of the query: '{query}'"
-            ),
-            max_tokens=15
-        )
-
-        related_terms = response.generations[0].text.strip()
-        # Clean and join the terms
-        related_terms = ", ".join([term.strip() for term in related_terms.split(",") if term.strip()])
+        related_terms = generate_related_terms(query)
 
         print("\n==============================")
         print(f"[DEBUG] Original Query: {query}")
@@ -641,7 +889,33 @@ def handle_submit():
 
         st.session_state.current_question = st.session_state.user_input
         st.session_state.processing = True
-        st.session_state.user_input = ""
+
+MESSAGE_ICONS = {"user": "👤", "bot": "🤖"}
+
+# Chat transcript rendered in its own persistent iframe (see chat_component/index.html)
+chat_transcript = components.declare_component(
+    "chat_transcript",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_component"),
+)
+
+def render_message(role, text):
+    """
+    Return the chat-bubble HTML for a 'user' or 'bot' message. Rendered bubbles
+    are cached in session state by content, so each message is formatted once.
+    """
+    cache = st.session_state.setdefault("message_html_cache", {})
+    key = (role, text)
+    message_html = cache.get(key)
+    if message_html is None:
+        message_html = (
+            f"<div class='{role}-message-container'>"
+            f"<div class='{role}-message'>"
+            f"<div class='message-icon'>{MESSAGE_ICONS[role]}</div>"
+            f"<div class='message-content'>{html.escape(text)}</div>"
+            f"</div></div>"
+        )
+        cache[key] = message_html
+    return message_html
 
 # ===========================================
 # 9) Generating Conversation PDF
@@ -719,16 +993,21 @@ class ChatPDF(FPDF):
 
         self.ln(5)
 
-def create_download_pdf(file_names):
+@st.cache_data(show_spinner=False, max_entries=16)
+def create_download_pdf(conversation_history, file_names):
     """
     Generate a PDF of the conversation history and return it as bytes.
+    Cached on the (tuple) history and file names, so reruns that don't change
+    the conversation reuse the previously rendered PDF. The cache is shared by
+    all sessions and only keeps the most recent PDFs. The "Generated on" header
+    therefore shows when this conversation state was first rendered.
     """
     try:
-        pdf = ChatPDF(file_names)
+        pdf = ChatPDF(list(file_names))
         pdf.alias_nb_pages()
 
-        if "conversation_history" in st.session_state and st.session_state.conversation_history:
-            for question, answer in st.session_state.conversation_history:
+        if conversation_history:
+            for question, answer in conversation_history:
                 pdf.add_message("User", question)
                 pdf.add_message("Assistant", answer)
         else:
@@ -844,47 +1123,208 @@ def evaluate_essay(question, answer):
     return evaluator.invoke(prompt).content
 
 # ===========================================
-# 11) QUIZ INTERFACE
+# 11) Page Styles
+# ===========================================
+
+QUIZ_CSS = """
+.quiz-header {
+    border-bottom: 1px solid #444;
+    padding-bottom: 1rem;
+    margin-bottom: 2rem;
+}
+.quiz-config {
+    background: #1a1a1a;
+    padding: 1.5rem;
+    border-radius: 10px;
+    margin: 1rem 0;
+}
+.question-container {
+    background: #1a1a1a;
+    padding: 1.5rem;
+    border-radius: 8px;
+    margin: 1.5rem 0;
+    border: 1px solid #333;
+}
+.difficulty-badge {
+    font-size: 0.8rem;
+    padding: 0.2rem 0.5rem;
+    border-radius: 4px;
+    margin-left: 0.5rem;
+}
+.easy { background: #2e7d32; color: white; }
+.medium { background: #f9a825; color: black; }
+.hard { background: #c62828; color: white; }
+.navigation-buttons {
+    margin-top: 2rem;
+    display: flex;
+    gap: 1rem;
+    justify-content: center;
+}
+"""
+
+MAIN_CSS = """
+/* Fixed download button */
+.stDownloadButton {
+    position: fixed;
+    top: 20px;
+    right: 20px;
+    z-index: 999;
+    background-color: transparent !important;
+    color: #fff !important;
+    border: 1px solid #262730 !important;
+    padding: 10px 10px !important;
+    border-radius: 4px !important;
+    width: 20% !important;
+    margin: 5px auto !important;
+    display: block !important;
+    text-align: center !important;
+    font-weight: 500 !important;
+}
+.stDownloadButton:hover {
+    background-color: #000 !important;
+    color: white;
+}
+
+/* Input row columns */
+div[data-testid="column"] {
+    padding: 0 4px !important;
+}
+div[data-testid="column"] button {
+    width: 100% !important;
+    padding: 8px 12px !important;
+    font-size: 0.9rem !important;
+    margin: 0 !important;
+}
+div[data-testid="column"] input {
+    padding: 10px !important;
+}
+
+/* Main container spacing */
+.main .block-container {
+    padding-bottom: 100px !important;
+}
+
+/* Fixed input footer: positioned once by the wrapping container and kept on
+   its own compositor layer, so re-mounted widgets don't reflow the page */
+.st-key-chat_footer {
+    position: fixed !important;
+    bottom: 20px !important;
+    left: calc(370px + 0.5rem) !important;
+    right: 2rem !important;
+    z-index: 999 !important;
+    transform: translateZ(0);
+    will-change: transform;
+    contain: layout paint;
+}
+.st-key-chat_footer div[data-testid="stHorizontalBlock"] {
+    display: flex !important;
+    gap: 10px !important;
+}
+
+/* Fixed input styling */
+.stForm div[data-testid="column"]:first-child .stTextInput input {
+    width: 100% !important;
+    background: #000 !important;
+    padding: 15px 20px !important;
+    border-radius: 8px !important;
+    border: 1px solid #4A4A4A !important;
+    color: white !important;
+    font-size: 0.9rem !important;
+    height: 40px !important;
+}
+
+/* Button column styling */
+div[data-testid="column"]:nth-child(2),
+div[data-testid="column"]:nth-child(3) {
+    flex: 0 0 auto !important;
+    width: auto !important;
+}
+
+/* 'Send' button styling */
+div[data-testid="column"]:nth-child(2) .stFormSubmitButton button {
+    background: #0E86D4 !important;
+    color: white !important;
+    height: 40px !important;
+    min-width: 80px !important;
+    border-radius: 6px !important;
+    cursor: pointer !important;
+    margin: 0 !important;
+    padding: 10px 8px !important;
+}
+
+/* 'Quiz' button styling */
+div[data-testid="column"]:nth-child(3) .stFormSubmitButton button {
+    height: 40px !important;
+    min-width: 90px !important;
+    border-radius: 6px !important;
+    cursor: pointer !important;
+    margin: 0 !important;
+    padding: 10px 8px !important;
+}
+
+/* Button hover effects */
+div[data-testid="column"] .stFormSubmitButton button:hover {
+    opacity: 0.9 !important;
+    transform: translateY(-1px) !important;
+    transition: all 0.2s ease !important;
+}
+
+/* Hide default Streamlit elements */
+[data-testid="stToolbar"],
+[data-testid="stDecoration"],
+[data-testid="stStatusWidget"],
+footer {
+    display: none !important;
+}
+
+/* Mobile responsiveness */
+@media (max-width: 768px) {
+    .st-key-chat_footer {
+        left: 1rem !important;
+        right: 1rem !important;
+        bottom: 10px !important;
+    }
+
+    div[data-testid="column"]:nth-child(2) .stFormSubmitButton button,
+    div[data-testid="column"]:nth-child(3) .stFormSubmitButton button {
+        padding: 8px 12px !important;
+        min-width: auto !important;
+    }
+}
+"""
+
+# Bouncing-dots loading indicator, animated inside a single SVG image and only
+# inserted into the page while a question is being answered
+LOADING_DOTS_SVG = """
+<svg xmlns="http://www.w3.org/2000/svg" width="32" height="16" viewBox="0 0 32 16">
+    <circle cx="4" cy="12" r="4" fill="#0E86D4">
+        <animateTransform attributeName="transform" type="translate" values="0 0;0 -8;0 0;0 0"
+            keyTimes="0;0.4;0.8;1" dur="1.4s" begin="-0.32s" repeatCount="indefinite"/>
+    </circle>
+    <circle cx="16" cy="12" r="4" fill="#0E86D4">
+        <animateTransform attributeName="transform" type="translate" values="0 0;0 -8;0 0;0 0"
+            keyTimes="0;0.4;0.8;1" dur="1.4s" begin="-0.16s" repeatCount="indefinite"/>
+    </circle>
+    <circle cx="28" cy="12" r="4" fill="#0E86D4">
+        <animateTransform attributeName="transform" type="translate" values="0 0;0 -8;0 0;0 0"
+            keyTimes="0;0.4;0.8;1" dur="1.4s" begin="0s" repeatCount="indefinite"/>
+    </circle>
+</svg>
+"""
+LOADING_DOTS_SRC = "data:image/svg+xml;base64," + base64.b64encode(LOADING_DOTS_SVG.strip().encode("utf-8")).decode("ascii")
+
+def inject_css(css):
+    """
+    Inject a stylesheet into the page as a single <style> element.
+    """
+    st.markdown(f"<style>\n{css}\n</style>", unsafe_allow_html=True)
+
+# ===========================================
+# 12) QUIZ INTERFACE
 # ===========================================
 
 if st.session_state.get("quiz_page"):
-    st.markdown("""
-    <style>
-        .quiz-header {
-            border-bottom: 1px solid #444;
-            padding-bottom: 1rem;
-            margin-bottom: 2rem;
-        }
-        .quiz-config {
-            background: #1a1a1a;
-            padding: 1.5rem;
-            border-radius: 10px;
-            margin: 1rem 0;
-        }
-        .question-container {
-            background: #1a1a1a;
-            padding: 1.5rem;
-            border-radius: 8px;
-            margin: 1.5rem 0;
-            border: 1px solid #333;
-        }
-        .difficulty-badge {
-            font-size: 0.8rem;
-            padding: 0.2rem 0.5rem;
-            border-radius: 4px;
-            margin-left: 0.5rem;
-        }
-        .easy { background: #2e7d32; color: white; }
-        .medium { background: #f9a825; color: black; }
-        .hard { background: #c62828; color: white; }
-        .navigation-buttons {
-            margin-top: 2rem;
-            display: flex;
-            gap: 1rem;
-            justify-content: center;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    inject_css(QUIZ_CSS)
 
     # Quiz header
     st.markdown('<div class="quiz-header">', unsafe_allow_html=True)
@@ -1026,34 +1466,15 @@ if st.session_state.get("quiz_page"):
 # 13) Streamlit UI and Interface
 # ===========================================
 
+inject_css(MAIN_CSS)
+
 with st.sidebar:
     # Logo and main controls
     st.image("logo.svg", width=200)
 
-    # Custom download button styling
-    st.markdown("""
-        <style>
-        .stDownloadButton {
-            background-color: transparent !important;
-            color: #fff !important;
-            border: 1px solid #262730 !important;
-            padding: 10px 10px !important;
-            border-radius: 4px !important;
-            width: 20% !important;
-            margin: 5px auto !important;
-            display: block !important;
-            text-align: center !important;
-            font-weight: 500 !important;
-        }
-        .stDownloadButton:hover {
-            background-color: #000 !important;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-
     # PDF download button
     st.markdown('<div style="text-align: center;">', unsafe_allow_html=True)
-    pdf_data = create_download_pdf(file_names=[])
+    pdf_data = create_download_pdf(tuple(st.session_state.conversation_history), file_names=())
     st.download_button(
         label="📥 Download Conversation",
         data=pdf_data if pdf_data else b"",
@@ -1121,13 +1542,15 @@ with st.sidebar:
             # Clear existing FAISS index before processing new files
             clear_old_index()
 
-            for file in uploaded_files:
-                if file_type == "PDF":
-                    combined_content += get_pdf_text(file) + "\n"
-                elif file_type == "PPT":
-                    combined_content += get_ppt_content(file) + "\n"
-                elif file_type == "Excel":
-                    combined_content += load_excel_and_convert_to_csv(file) + "\n"
+            # Parse the uploaded files in parallel
+            extractors = {
+                "PDF": get_pdf_text,
+                "PPT": get_ppt_content,
+                "Excel": load_excel_and_convert_to_csv,
+            }
+            with ThreadPoolExecutor(max_workers=min(MAX_INGEST_WORKERS, len(uploaded_files))) as executor:
+                parts = list(executor.map(extractors[file_type], uploaded_files))
+            combined_content = "".join(part + "\n" for part in parts)
 
             # Update session content
             st.session_state.content = combined_content
@@ -1165,74 +1588,32 @@ if "uploaded_files" in st.session_state:
 else:
     file_names = []
 
-# Additional CSS for the download button
-st.markdown("""
-<style>
-    .stDownloadButton {
-        position: fixed;
-        top: 20px;
-        right: 20px;
-        z-index: 999;
-        background-color: #000000;
-        color: white;
-        border-radius: 4px;
-        padding: 0.5rem 1rem;
-        font-weight: bold;
-    }
-    .stDownloadButton:hover {
-        background-color: #0A6AAE;
-        color: white;
-    }
-</style>
-""", unsafe_allow_html=True)
-
 # ===========================================
 # 15) Chat Display and Logic
 # ===========================================
 
 chat_placeholder = st.container()
 with chat_placeholder:
-    # Display existing conversation
-    for q, a in st.session_state.conversation_history:
-        st.markdown(f"""
-            <div class='message-container'>
-                <div class='user-message-container'>
-                    <div class='user-message'>
-                        <div class='message-icon'>👤</div>
-                        <div class='message-content'>{q}</div>
-                    </div>
-                </div>
-                <div class='bot-message-container'>
-                    <div class='bot-message'>
-                        <div class='message-icon'>🤖</div>
-                        <div class='message-content'>{a}</div>
-                    </div>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
-
-    # Display loading indicator if a question is being processed
-    if st.session_state.processing and st.session_state.current_question:
-        st.markdown(f"""
-            <div class='message-container'>
-                <div class='user-message-container'>
-                    <div class='user-message'>
-                        <div class='message-icon'>👤</div>
-                        <div class='message-content'>{st.session_state.current_question}</div>
-                    </div>
-                </div>
-                <div class='bot-message-container'>
-                    <div class='bot-message loading'>
-                        <div class='dots-container'>
-                            <div class='dot'></div>
-                            <div class='dot'></div>
-                            <div class='dot'></div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
+    # Display the conversation (plus any pending question) in the transcript
+    # component, which keeps its DOM across reruns and appends only new messages
+    messages_html = [
+        f"<div class='message-container'>{render_message('user', q)}{render_message('bot', a)}</div>"
+        for q, a in st.session_state.conversation_history
+    ]
+    pending = st.session_state.processing and st.session_state.current_question
+    pending_html = None
+    if pending:
+        pending_html = (
+            f"<div class='message-container'>"
+            f"{render_message('user', st.session_state.current_question)}"
+            f"<div class='bot-message-container'><div class='bot-message loading'>"
+            f"<img class='loading-indicator' src='{LOADING_DOTS_SRC}' alt='Loading...'>"
+            f"</div></div></div>"
+        )
+    chat_transcript(messages=messages_html, pending=pending_html, key="chat_transcript", default=None)
 
+    # Answer the pending question, showing the loading indicator meanwhile
+    if pending:
         # Determine whether to process an image or text-based question
         if st.session_state.uploaded_image is not None:
             response = get_gemini_response(st.session_state.current_question, st.session_state.uploaded_image)
@@ -1249,221 +1630,34 @@ with chat_placeholder:
 # 16) Input Box for Questions
 # ===========================================
 
-st.markdown("""
-    <style>
-    div[data-testid="column"] {
-        padding: 0 4px !important;
-    }
-    div[data-testid="column"] button {
-        width: 100% !important;
-        padding: 8px 12px !important;
-        font-size: 0.9rem !important;
-        margin: 0 !important;
-    }
-    div[data-testid="column"] input {
-        padding: 10px !important;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-input_container = st.container()
+input_container = st.container(key="chat_footer")
 with input_container:
+    # A form submits once per question (Enter or Send), instead of the text
+    # input's on_change and the button's on_click each triggering a rerun
+    with st.form("question_form", clear_on_submit=True, border=False):
+        col1, col2, col3 = st.columns([12.5, 1, 1.5])
 
-    col1, col2, col3 = st.columns([12.5, 1, 1.5]) 
-    
-    with col1:
-        st.text_input(
-            label="",
-            placeholder="Type your question here...",
-            key="user_input",
-            on_change=handle_submit,
-            label_visibility="collapsed"
-        )
-    
-    with col2:
-        st.button("Send", 
-                on_click=handle_submit,
-                type="primary")
-    
-    with col3:
-        # Quiz button with proper styling
-        quiz_disabled = not st.session_state.get("documents_processed", False)
-        st.button("Take Quiz",
-                disabled=quiz_disabled,
-                on_click=lambda: st.session_state.update(quiz_page=True),
-                help="Upload documents first" if quiz_disabled else "Start quiz",
-                type="secondary" if quiz_disabled else "primary")
-
-# ===========================================
-# 17) COMPLETE CSS
-# ===========================================
-st.markdown("""
-<style>
-/* Main container spacing */
-.main .block-container {
-    padding-bottom: 100px !important;
-}
-
-/* Message container styles */
-.message-container {
-    margin: 1rem 0;
-    padding: 0 1rem;
-}
-
-/* Loading animation styling for bot messages */
-.bot-message.loading {
-    background-color: #1A1A1A;
-    padding: 1rem;
-}
-
-.dots-container {
-    display: flex;
-    gap: 4px;
-}
-
-.dot {
-    width: 8px;
-    height: 8px;
-    background-color: #0E86D4;
-    border-radius: 50%;
-    animation: bounce 1.4s infinite ease-in-out;
-}
-
-.dot:nth-child(1) {
-    animation-delay: -0.32s;
-}
-.dot:nth-child(2) {
-    animation-delay: -0.16s;
-}
-
-@keyframes bounce {
-    0%, 80%, 100% {
-        transform: translateY(0);
-    }
-    40% {
-        transform: translateY(-8px);
-    }
-}
-
-/* Fixed input container styling */
-div[data-testid="stHorizontalBlock"] {
-    position: fixed !important;
-    bottom: 20px !important;
-    left: calc(370px + 0.5rem) !important;
-    width: calc(100% - (370px + 2.5rem)) !important;
-    display: flex !important;
-    gap: 10px !important;
-    z-index: 999 !important;
-}
-
-/* Fixed input styling */
-div[data-testid="column"]:first-child .stTextInput input {
-    width: 100% !important;
-    background: #000 !important;
-    padding: 15px 20px !important;
-    border-radius: 8px !important;
-    border: 1px solid #4A4A4A !important;
-    color: white !important;
-    font-size: 0.9rem !important;
-    height: 40px !important;
-}
-
-/* Button column styling */
-div[data-testid="column"]:nth-child(2),
-div[data-testid="column"]:nth-child(3) {
-    flex: 0 0 auto !important;
-    width: auto !important;
-}
-
-/* 'Send' button styling */
-div[data-testid="column"]:nth-child(2) .stButton button {
-    background: #0E86D4 !important;
-    color: white !important;
-    height: 40px !important;
-    min-width: 80px !important;
-    border-radius: 6px !important;
-    cursor: pointer !important;
-    margin: 0 !important;
-    padding: 10px 8px !important;
-}
-
-/* 'Quiz' button styling */
-div[data-testid="column"]:nth-child(3) .stButton button {
-    height: 40px !important;
-    min-width: 90px !important;
-    border-radius: 6px !important;
-    cursor: pointer !important;
-    margin: 0 !important;
-    padding: 10px 8px !important;
-}
-
-/* Button hover effects */
-div[data-testid="column"] .stButton button:hover {
-    opacity: 0.9 !important;
-    transform: translateY(-1px) !important;
-    transition: all 0.2s ease !important;
-}
-
-/* Hide default Streamlit elements */
-[data-testid="stToolbar"],
-[data-testid="stDecoration"],
-[data-testid="stStatusWidget"],
-footer {
-    display: none !important;
-}
-
-/* User/bot message styling */
-.user-message-container {
-    display: flex;
-    justify-content: flex-end;
-    margin-bottom: 0.5rem;
-}
-.bot-message-container {
-    display: flex;
-    justify-content: flex-start;
-    margin-bottom: 0.5rem;
-}
-.user-message, .bot-message {
-    padding: 0.8rem;
-    border-radius: 15px;
-    max-width: 80%;
-    display: flex;
-    align-items: flex-start;
-}
-.user-message {
-    background-color: #2C3333;
-    border-radius: 15px 15px 0 15px;
-    margin-left: auto;
-}
-.bot-message {
-    background-color: #1A1A1A;
-    border-radius: 15px 15px 15px 0;
-}
-.message-icon {
-    margin-right: 0.5rem;
-    font-size: 1.2rem;
-}
-.message-content {
-    color: #FFFFFF;
-    line-height: 1.5;
-}
+        with col1:
+            st.text_input(
+                label="",
+                placeholder="Type your question here...",
+                key="user_input",
+                label_visibility="collapsed"
+            )
 
-/* Mobile responsiveness */
-@media (max-width: 768px) {
-    div[data-testid="stHorizontalBlock"] {
-        left: 1rem !important;
-        width: calc(100% - 2rem) !important;
-        bottom: 10px !important;
-    }
-    
-    div[data-testid="column"]:nth-child(2) .stButton button,
-    div[data-testid="column"]:nth-child(3) .stButton button {
-        padding: 8px 12px !important;
-        min-width: auto !important;
-    }
-}
-</style>
-""", unsafe_allow_html=True)
+        with col2:
+            st.form_submit_button("Send",
+                    on_click=handle_submit,
+                    type="primary")
+
+        with col3:
+            # Quiz button with proper styling
+            quiz_disabled = not st.session_state.get("documents_processed", False)
+            st.form_submit_button("Take Quiz",
+                    disabled=quiz_disabled,
+                    on_click=lambda: st.session_state.update(quiz_page=True),
+                    help="Upload documents first" if quiz_disabled else "Start quiz",
+                    type="secondary" if quiz_disabled else "primary")
 
 # ===========================================
 # THE END
@@ -0,0 +1,61 @@
+import ast
+import io
+from pathlib import Path
+
+import pytest
+
+pptx = pytest.importorskip("pptx")
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.util import Inches
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+
+
+def load_app_functions(*names):
+    """
+    Load selected top-level functions from app.py without running the
+    Streamlit script (and its heavy imports) around them.
+    """
+    tree = ast.parse(APP_PATH.read_text(encoding="utf-8"))
+    functions = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    namespace = {}
+    exec(compile(ast.Module(body=functions, type_ignores=[]), str(APP_PATH), "exec"), namespace)
+    return [namespace[name] for name in names]
+
+
+iter_shape_text, get_ppt_content = load_app_functions("iter_shape_text", "get_ppt_content")
+
+
+def save_to_buffer(prs):
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_text_shape_without_preset_geometry():
+    prs = pptx.Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Inches(1), Inches(1), Inches(4), Inches(1))
+    shape.text_frame.text = "Quarterly revenue grew 12%"
+
+    # Drop the preset geometry so python-pptx can no longer classify the shape
+    prst_geom = shape._element.spPr.prstGeom
+    prst_geom.getparent().remove(prst_geom)
+    with pytest.raises(NotImplementedError):
+        shape.shape_type
+
+    assert get_ppt_content(save_to_buffer(prs)) == "Quarterly revenue grew 12%"
+
+
+def test_group_shapes_and_tables_are_included():
+    prs = pptx.Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    group = slide.shapes.add_group_shape()
+    group.shapes.add_textbox(Inches(1), Inches(1), Inches(2), Inches(1)).text_frame.text = "Grouped text"
+    table = slide.shapes.add_table(2, 2, Inches(1), Inches(3), Inches(4), Inches(1)).table
+    for row_idx, row in enumerate(table.rows):
+        for col_idx, cell in enumerate(row.cells):
+            cell.text = f"r{row_idx}c{col_idx}"
+
+    assert get_ppt_content(save_to_buffer(prs)) == "Grouped text\nr0c0 | r0c1\nr1c0 | r1c1"